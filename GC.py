@@ -8,7 +8,7 @@ Expand input words (Arabic + English) into many spelling variants:
 - Optional repeated letters (once)
 - Optional separators between letters: "", ".", "_", " " (configurable)
 - Arabic substitutions: ه/ة, ا/أ/إ/آ/ٱ, ى/ي, ؤ/و, ئ/ي, plus optional tatweel removal and diacritics stripping
-- Case variants for English (lower/UPPER/Title)
+- Case variants for English (lower/UPPER/Title, then every per-letter mix)
 
 Outputs a comma-separated list.
 
@@ -16,19 +16,28 @@ Usage examples:
   python generate_combinations.py --input words.txt --output output.csv
   echo "software" | python generate_combinations.py --stdin --max-per-word 400
   python generate_combinations.py --input words.txt --separators "" "." "_" " " --repeat --leet
+  python generate_combinations.py --input words.txt --leet --case --jobs 4
 
 Safety note: This script is content-agnostic; you supply the words.
 """
 
 import argparse
+import functools
+import heapq
 import itertools
+import math
+import os
 import re
 import sys
+from collections.abc import Iterable, Iterator, Sequence
 from pathlib import Path
+from typing import Optional
 
 # ---------------- Defaults ----------------
 DEFAULT_SEPARATORS = ["", ".", "_", " "]
 DEFAULT_MAX_PER_WORD = 400
+PARALLEL_MIN_WORDS = 100  # below this, worker start-up costs more than it saves
+CASE_MASK_LETTERS = 16  # mixed-case forms cover at most 2**16 masks per variant
 
 # Arabic diacritics range
 AR_DIACRITICS = "".join([
@@ -38,7 +47,30 @@ AR_DIACRITICS = "".join([
     "\u0653", "\u0654", "\u0655", "\u0656", "\u0657", "\u0658", "\u0659", "\u065A",
     "\u065B", "\u065C", "\u065D", "\u065E", "\u065F", "\u0670"
 ])
-AR_DIACRITICS_RE = re.compile("[" + re.escape(AR_DIACRITICS) + "]")
+AR_DIACRITICS_DELETE: dict[int, None] = dict.fromkeys(map(ord, AR_DIACRITICS))
+
+# Arabic + Arabic Supplement + Arabic Extended-A blocks (common coverage)
+AR_TEXT_RE = re.compile("[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]")
+
+# Arabic normalization to canonical letters, compiled once per
+# (rm_tatweel, strip_diacritics) combination so normalizing is a single translate
+AR_NORMALIZE: dict[str, Optional[str]] = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+    "ک": "ك",
+}
+AR_NORMALIZE_TABLES: dict[tuple[bool, bool], dict[int, Optional[str]]] = {
+    (rm_tatweel, strip_diacritics): {
+        **str.maketrans(AR_NORMALIZE),
+        **({ord("ـ"): None} if rm_tatweel else {}),
+        **(AR_DIACRITICS_DELETE if strip_diacritics else {}),
+    }
+    for rm_tatweel in (False, True)
+    for strip_diacritics in (False, True)
+}
 
 # Arabic substitution groups
 AR_GROUPS = [
@@ -51,13 +83,11 @@ AR_GROUPS = [
     {"ـ"},         # tatweel
 ]
 
-AR_GROUP_MAP = {}
-for grp in AR_GROUPS:
-    for ch in grp:
-        AR_GROUP_MAP[ch] = grp
+# char -> its group's letters, pre-sorted once
+AR_GROUP_MAP: dict[str, tuple[str, ...]] = {ch: tuple(sorted(grp)) for grp in AR_GROUPS for ch in grp}
 
 # English leetspeak
-EN_LEET = {
+EN_LEET: dict[str, list[str]] = {
     "a": ["a", "@", "4"],
     "b": ["b", "8"],
     "c": ["c", "("],
@@ -86,132 +116,262 @@ EN_LEET = {
     "z": ["z", "2"],
 }
 
+# EN_LEET as tuples indexed by ASCII code point (None = no substitutions)
+EN_LEET_TABLE: list[Optional[tuple[str, ...]]] = [
+    tuple(EN_LEET[chr(cp)]) if chr(cp) in EN_LEET else None for cp in range(128)
+]
+
+def expand_choices(choices: Sequence[Sequence[str]], separators: Sequence[str], limit: int) -> Iterator[str]:
+    """Yield the first `limit` Cartesian joins of per-position choices, once per separator.
+
+    Walks the combinations as an odometer (last position fastest, same order as
+    itertools.product), so each step touches only the positions that roll over.
+    Separators go between characters, as before.
+    """
+    n = min(math.prod(len(opts) for opts in choices), limit)
+    digits = [0] * len(choices)
+    current = [opts[0] for opts in choices]
+    for _ in range(n):
+        combo = "".join(current)
+        for sep in separators:
+            yield sep.join(combo) if sep else combo
+        i = len(choices) - 1
+        while i >= 0:
+            opts = choices[i]
+            d = digits[i] + 1
+            if d < len(opts):
+                digits[i] = d
+                current[i] = opts[d]
+                break
+            digits[i] = 0
+            current[i] = opts[0]
+            i -= 1
+
+def unique_variants(variants: Iterable[str]) -> Iterator[str]:
+    """Yield distinct variants in order."""
+    seen: set[str] = set()
+    for v in variants:
+        if v not in seen:
+            seen.add(v)
+            yield v
+
+def unique_capped(variants: Iterable[str], limit: int) -> Iterator[str]:
+    """First `limit` distinct variants; the producer is not advanced past the cap."""
+    return itertools.islice(unique_variants(variants), max(limit, 0))
+
 def is_arabic_text(s: str) -> bool:
-    for ch in s:
-        # Arabic + Arabic Supplement blocks (common coverage)
-        if "\u0600" <= ch <= "\u06FF" or "\u0750" <= ch <= "\u077F" or "\u08A0" <= ch <= "\u08FF":
-            return True
-    return False
+    return AR_TEXT_RE.search(s) is not None
 
 def strip_arabic_diacritics(text: str) -> str:
-    return AR_DIACRITICS_RE.sub("", text)
+    return text.translate(AR_DIACRITICS_DELETE)
 
 def normalize_arabic_base(s: str, rm_tatweel: bool, strip_diacritics: bool) -> str:
-    repl = {
-        "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
-        "ة": "ه",
-        "ى": "ي",
-        "ؤ": "و",
-        "ئ": "ي",
-        "ک": "ك",
-    }
-    for k, v in repl.items():
-        s = s.replace(k, v)
-    if rm_tatweel:
-        s = s.replace("ـ", "")
-    if strip_diacritics:
-        s = strip_arabic_diacritics(s)
-    return s
+    return s.translate(AR_NORMALIZE_TABLES[rm_tatweel, strip_diacritics])
 
 def arabic_variants(word: str,
-                    separators,
+                    separators: Sequence[str],
                     max_variants_per_word: int,
                     enable_ar_subs: bool,
                     rm_tatweel: bool,
-                    strip_diacritics: bool):
+                    strip_diacritics: bool) -> Iterator[str]:
     base = word
     if rm_tatweel:
         base = base.replace("ـ", "")
     if strip_diacritics:
         base = strip_arabic_diacritics(base)
 
-    choices = []
-    for ch in base:
-        if enable_ar_subs and ch in AR_GROUP_MAP:
-            choices.append(sorted(AR_GROUP_MAP[ch]))
-        else:
-            choices.append([ch])
+    if enable_ar_subs:
+        choices = [AR_GROUP_MAP.get(ch, (ch,)) for ch in base]
+    else:
+        choices = [(ch,) for ch in base]
 
-    variants = set()
-    for prod in itertools.product(*choices):
-        variants.add("".join(prod))
+    # No substitutions apply: the only combination is the base itself
+    if math.prod(map(len, choices)) == 1:
+        yield from unique_capped((sep.join(base) if sep else base for sep in separators), max_variants_per_word)
+        return
 
-    # insert uniform separator between chars
-    sep_forms = set()
-    for v in variants:
-        for sep in separators:
-            sep_forms.add(sep.join(list(v)) if sep != "" else v)
-    variants = sep_forms
+    # uniform separator between chars is inserted during the expansion
+    variants = expand_choices(choices, separators, max_variants_per_word)
+    yield from unique_capped(variants, max_variants_per_word)
 
-    if len(variants) > max_variants_per_word:
-        variants = set(list(variants)[:max_variants_per_word])
-    return variants
+def with_repeats(variants: Iterable[str]) -> Iterator[str]:
+    """Yield each variant followed by every form with one character doubled."""
+    for v in variants:
+        yield v
+        for i in range(len(v)):
+            yield v[:i] + v[i]*2 + v[i+1:]
+
+def with_cases(variants: Iterable[str]) -> Iterator[str]:
+    """Yield each variant with its lower/UPPER/Title forms, then every per-letter case mix.
+
+    The mixes are enumerated as bitmasks over the first CASE_MASK_LETTERS letters
+    (bit k set = letter k upper-cased) after all the plain forms, so a per-word
+    cap keeps the common forms of every variant first.
+
+    >>> list(with_cases(["ab"]))
+    ['ab', 'ab', 'AB', 'Ab', 'ab', 'Ab', 'aB', 'AB']
+    >>> list(with_cases(["שלום"]))
+    ['שלום', 'שלום', 'שלום', 'שלום']
+    >>> list(english_variants("ab", [""], 3, False, False, True))
+    ['ab', 'AB', 'Ab']
+    """
+    materialized = list(variants)
+    for v in materialized:
+        yield v
+        yield v.lower()
+        yield v.upper()
+        yield v.title()
+    for v in materialized:
+        # per-character lower/upper forms, built once per variant and copied per mask
+        lowers = [c.lower() for c in v]
+        uppers = [c.upper() for c in v]
+        # only positions whose case actually changes; uncased letters would repeat every mask
+        letters = [i for i in range(len(v)) if lowers[i] != uppers[i]][:CASE_MASK_LETTERS]
+        if not letters:
+            continue
+        for mask in range(1 << len(letters)):
+            out = lowers.copy()
+            for k, i in enumerate(letters):
+                if mask >> k & 1:
+                    out[i] = uppers[i]
+            yield "".join(out)
 
 def english_variants(word: str,
-                     separators,
+                     separators: Sequence[str],
                      max_variants_per_word: int,
                      enable_leet: bool,
                      enable_repeat: bool,
-                     enable_case: bool):
-    w = word
-
-    # Build choices per character
-    def char_choices(ch: str):
-        opts = [ch]
-        if enable_leet and ch.lower() in EN_LEET:
-            opts = EN_LEET[ch.lower()]
-        return opts
-
-    base_choices = [char_choices(ch) for ch in w]
+                     enable_case: bool) -> Iterator[str]:
+    if enable_leet:
+        # ord(ch) | 0x20 folds ASCII upper case onto lower case
+        base_choices = [(EN_LEET_TABLE[ord(ch) | 0x20] if ch.isascii() else None) or (ch,) for ch in word]
+    else:
+        base_choices = [(ch,) for ch in word]
+
+    # Separators can be fused into the expansion unless repeats/case rewrite it first
+    if not (enable_repeat or enable_case):
+        if math.prod(map(len, base_choices)) == 1:
+            # No leet substitutions apply: the only combination is the word itself
+            variants: Iterator[str] = (sep.join(word) if sep else word for sep in separators)
+        else:
+            variants = expand_choices(base_choices, separators, max_variants_per_word)
+        yield from unique_capped(variants, max_variants_per_word)
+        return
 
-    variants = set("".join(prod) for prod in itertools.product(*base_choices))
+    variants = expand_choices(base_choices, [""], max_variants_per_word)
 
     # Optional repeats (double one character once)
     if enable_repeat:
-        extra = set()
-        for v in list(variants):
-            for i in range(len(v)):
-                extra.add(v[:i] + v[i]*2 + v[i+1:])
-        variants |= extra
+        variants = with_repeats(variants)
 
     # Case variants
     if enable_case:
-        case_more = set()
-        for v in list(variants):
-            case_more.add(v.lower())
-            case_more.add(v.upper())
-            case_more.add(v.title())
-        variants |= case_more
+        variants = with_cases(variants)
 
     # Separators
-    sep_forms = set()
-    for v in variants:
-        for sep in separators:
-            sep_forms.add(sep.join(list(v)) if sep != "" else v)
-    variants = sep_forms
-
-    if len(variants) > max_variants_per_word:
-        variants = set(list(variants)[:max_variants_per_word])
-    return variants
+    sep_forms = (sep.join(v) if sep else v for v in variants for sep in separators)
+    yield from unique_capped(sep_forms, max_variants_per_word)
 
-def load_words(args) -> list[str]:
+def load_words(args: argparse.Namespace) -> list[str]:
     words = []
     if args.stdin:
-        for line in sys.stdin:
-            line = line.strip()
-            if line:
-                words.append(line)
+        stdin_words = []
+        try:
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    stdin_words.append(line)
+        except UnicodeDecodeError as e:
+            print(f"[warn] skipping STDIN, it is not valid {sys.stdin.encoding}: {e}", file=sys.stderr)
+        else:
+            words += stdin_words
     if args.input:
         p = Path(args.input)
         if p.exists():
-            words += [ln.strip() for ln in p.read_text(encoding="utf-8").splitlines() if ln.strip()]
+            # Decode once and split as text, so every line boundary str.splitlines()
+            # knows (\v, \f, \x1c-\x1e, \x85, \u2028, \u2029) still separates words
+            try:
+                text = p.read_bytes().decode("utf-8")
+            except UnicodeDecodeError as e:
+                print(f"[warn] skipping input file that is not valid UTF-8: {p}: {e}", file=sys.stderr)
+                text = ""
+            for ln in text.splitlines():
+                word = ln.strip()
+                if word:
+                    words.append(word)
         else:
             print(f"[warn] input file not found: {p}", file=sys.stderr)
     if not words and args.words:
-        words = args.words
-    return list(dict.fromkeys(words))  # dedupe, preserve order
+        words = [w.strip() for w in args.words if w.strip()]
 
-def main():
+    # Validate up front so the per-word expansion needs no error handling;
+    # undecodable sources were skipped above, this catches surrogate-escaped argv
+    valid: list[str] = []
+    for w in dict.fromkeys(words):  # dedupe, preserve order
+        try:
+            w.encode("utf-8")
+        except UnicodeEncodeError:
+            print(f"[warn] skipping word that is not valid UTF-8: {w!r}", file=sys.stderr)
+            continue
+        valid.append(w)
+    return valid
+
+def process_word(w: str, args: argparse.Namespace) -> list[bytes]:
+    """Sorted UTF-8 variants of one word under the CLI options; top-level so worker processes can run it.
+
+    Variants are encoded here, once per word, so merging and writing work on bytes
+    (UTF-8 byte order matches code point order, so sorting is unchanged).
+    """
+    if is_arabic_text(w):
+        base = w
+        if args.ar_normalize:
+            base = normalize_arabic_base(
+                w,
+                rm_tatweel=args.ar_remove_tatweel,
+                strip_diacritics=args.ar_strip_diacritics
+            )
+        variants = arabic_variants(
+            base,
+            separators=args.separators,
+            max_variants_per_word=args.max_per_word,
+            enable_ar_subs=args.ar_subs,
+            rm_tatweel=args.ar_remove_tatweel,
+            strip_diacritics=args.ar_strip_diacritics
+        )
+    else:
+        variants = english_variants(
+            w,
+            separators=args.separators,
+            max_variants_per_word=args.max_per_word,
+            enable_leet=args.leet,
+            enable_repeat=args.repeat,
+            enable_case=args.case
+        )
+    return sorted(v.encode("utf-8") for v in variants)
+
+def merge_sorted(runs: Iterable[Iterable[bytes]]) -> Iterator[bytes]:
+    """Merge per-word sorted runs into one sorted stream, dropping repeats across words."""
+    prev: Optional[bytes] = None
+    for v in heapq.merge(*runs):
+        if v != prev:
+            yield v
+            prev = v
+
+def write_variants(out_path: Path, variants: Iterable[bytes]) -> int:
+    """Stream UTF-8 variants to out_path, comma-separated, through a large write buffer.
+
+    Returns the number of variants written.
+    """
+    count = 0
+    with open(out_path, "wb", buffering=1 << 20) as f:
+        for v in variants:
+            if count:
+                f.write(b",")
+            f.write(v)
+            count += 1
+    return count
+
+def main() -> None:
     ap = argparse.ArgumentParser(description="Generate word variants (Arabic + English).")
     ap.add_argument("--input", help="UTF-8 text file (one word per line)")
     ap.add_argument("--stdin", action="store_true", help="Read words from STDIN (one per line)")
@@ -219,12 +379,13 @@ def main():
     ap.add_argument("--output", default="output.csv", help="Write comma-separated variants here (default: output.csv)")
 
     ap.add_argument("--max-per-word", type=int, default=DEFAULT_MAX_PER_WORD, help="Cap variants per word (default 400)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help=f"Worker processes for expanding words, used from {PARALLEL_MIN_WORDS} words up (default: CPU count)")
     ap.add_argument("--separators", nargs="*", default=DEFAULT_SEPARATORS, help='List of separators between letters (default: "", ".", "_", " ")')
 
     # English toggles
     ap.add_argument("--leet", action="store_true", help="Enable English leetspeak substitutions")
     ap.add_argument("--repeat", action="store_true", help="Enable English single repeated letter inserts")
-    ap.add_argument("--case", action="store_true", help="Enable English case variants (lower/UPPER/Title)")
+    ap.add_argument("--case", action="store_true", help="Enable English case variants (lower/UPPER/Title, then per-letter mixes)")
 
     # Arabic toggles
     ap.add_argument("--ar-subs", action="store_true", help="Enable Arabic letter-group substitutions")
@@ -239,43 +400,24 @@ def main():
         print("No words provided. Use --input, --stdin, or --words.", file=sys.stderr)
         sys.exit(1)
 
-    all_out = set()
-
-    for w in words:
-        try:
-            if is_arabic_text(w):
-                base = w
-                if args.ar_normalize:
-                    base = normalize_arabic_base(
-                        w,
-                        rm_tatweel=args.ar_remove_tatweel,
-                        strip_diacritics=args.ar_strip_diacritics
-                    )
-                vars_ar = arabic_variants(
-                    base,
-                    separators=args.separators,
-                    max_variants_per_word=args.max_per_word,
-                    enable_ar_subs=args.ar_subs,
-                    rm_tatweel=args.ar_remove_tatweel,
-                    strip_diacritics=args.ar_strip_diacritics
-                )
-                all_out |= vars_ar
-            else:
-                vars_en = english_variants(
-                    w,
-                    separators=args.separators,
-                    max_variants_per_word=args.max_per_word,
-                    enable_leet=args.leet,
-                    enable_repeat=args.repeat,
-                    enable_case=args.case
-                )
-                all_out |= vars_en
-        except Exception as e:
-            print(f"[warn] failed on word '{w}': {e}", file=sys.stderr)
+    word_variants = functools.partial(process_word, args=args)
+    try:
+        jobs = min(args.jobs, len(words))
+        if jobs > 1 and len(words) >= PARALLEL_MIN_WORDS:
+            # imported here so serial runs don't pay for loading multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            chunksize = max(1, len(words) // (4 * jobs))
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                per_word_sorted = list(ex.map(word_variants, words, chunksize=chunksize))
+        else:
+            per_word_sorted = [word_variants(w) for w in words]
+    except Exception as e:
+        print(f"[error] failed to expand words: {e}", file=sys.stderr)
+        sys.exit(1)
 
     out_path = Path(args.output)
-    out_path.write_text(",".join(sorted(all_out)), encoding="utf-8")
-    print(f"[ok] {len(all_out)} variants written to {out_path}")
+    count = write_variants(out_path, merge_sorted(per_word_sorted))
+    print(f"[ok] {count} variants written to {out_path}")
 
 if __name__ == "__main__":
     main()